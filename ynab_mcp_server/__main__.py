@@ -7,7 +7,7 @@ import logging
 import argparse
 from dotenv import load_dotenv
 
-from .server import mcp, register_tools, setup_debug_logging
+from .debug_utils import set_logging_enabled
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +28,17 @@ def main():
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # The log_tool_call decorator specializes at registration time, so the
+    # flag has to be set before the server module registers the tools
+    set_logging_enabled(args.logging)
+
+    from .server import mcp, register_tools, setup_debug_logging
+
     # Setup debug logging based on flag
     setup_debug_logging(args.logging)
     
-    # Initialize tools
+    # Registration is deferred to here so importing the server module stays
+    # cheap and the stdio handshake isn't blocked by schema builds
     register_tools()
     
     # Run the server in STDIO mode for Claude Desktop
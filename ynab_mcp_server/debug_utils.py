@@ -32,21 +32,39 @@ def debug_log_tool_call(tool_name: str, arguments: Dict[str, Any]) -> None:
 
 
 def log_tool_call(func):
-    """Decorator to log tool calls automatically"""
-    
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Only log if logging is enabled
-        if LOGGING_ENABLED:
-            # Get function signature to map args to parameter names
-            sig = inspect.signature(func)
-            bound_args = sig.bind(*args, **kwargs)
-            bound_args.apply_defaults()
-            
-            # Log the call
-            debug_log_tool_call(func.__name__, bound_args.arguments)
-        
-        # Call the original function
-        return func(*args, **kwargs)
-    
+    """Decorator to log tool calls automatically.
+
+    Specialized at decoration time: when debug logging is disabled the
+    function is returned unwrapped, so the common case pays nothing per
+    call. set_logging_enabled must run before tools are registered.
+    """
+    if not LOGGING_ENABLED:
+        return func
+
+    # Precompute the parameter names and defaults once at decoration so the
+    # wrapper doesn't re-run Signature.bind on every call
+    parameters = inspect.signature(func).parameters
+    param_names = tuple(parameters)
+    param_defaults = {
+        name: param.default
+        for name, param in parameters.items()
+        if param.default is not inspect.Parameter.empty
+    }
+
+    def _log(args, kwargs):
+        arguments = {**param_defaults, **dict(zip(param_names, args)), **kwargs}
+        debug_log_tool_call(func.__name__, arguments)
+
+    if inspect.iscoroutinefunction(func):
+        # Async tools need an async wrapper so FastMCP awaits them
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            _log(args, kwargs)
+            return await func(*args, **kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _log(args, kwargs)
+            return func(*args, **kwargs)
+
     return wrapper
\ No newline at end of file
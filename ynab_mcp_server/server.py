@@ -1,38 +1,47 @@
 """
 YNAB MCP Server - Main server implementation
 """
+import asyncio
+import concurrent.futures
 import os
+import socket
 import logging
 import argparse
-from typing import Optional
+import threading
+import types
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
+
+# Load environment variables before the tool modules snapshot them at import
+load_dotenv()
+
+# Frozen snapshot of the environment - read os.environ once at startup
+# instead of on every request (the env doesn't change for a running server)
+CONFIG = types.SimpleNamespace(
+    ynab_api_key=os.getenv("YNAB_API_KEY"),
+    log_level=os.getenv("LOG_LEVEL", "INFO"),
+    server_name=os.getenv("MCP_SERVER_NAME", "YNAB MCP Server"),
+)
+
 from mcp.server.fastmcp import FastMCP
 import ynab
 from ynab.api_client import ApiClient
 from ynab.configuration import Configuration
+from urllib3.util.retry import Retry
 
-# Import tool modules
-from .tools import (
-    budgets,
-    accounts,
-    transactions,
-    categories,
-    payees,
-    user
-)
-
-# Load environment variables
-load_dotenv()
+# Tool modules resolve lazily through the tools package (PEP 562), so the
+# per-domain SDK models are only imported when a module is registered
+from . import tools
 
 # Configure logging
 logging.basicConfig(
-    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO")),
+    level=getattr(logging, CONFIG.log_level),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
 # Initialize MCP server
-mcp = FastMCP(os.getenv("MCP_SERVER_NAME", "YNAB MCP Server"))
+mcp = FastMCP(CONFIG.server_name)
 
 # Global YNAB client
 ynab_client: Optional[ApiClient] = None
@@ -45,51 +54,225 @@ def get_ynab_client() -> ApiClient:
     global ynab_client
     
     if ynab_client is None:
-        api_key = os.getenv("YNAB_API_KEY")
+        api_key = CONFIG.ynab_api_key
         if not api_key:
             raise ValueError("YNAB_API_KEY environment variable is not set")
         
         configuration = Configuration(
             access_token=api_key
         )
+        # Keep a healthy urllib3 pool so concurrent calls reuse live connections
+        configuration.connection_pool_maxsize = 20
+        # Retry transient failures at the pool level with a short backoff
+        configuration.retries = Retry(total=2, backoff_factor=0.2)
+        # Send small request frames immediately and keep idle connections
+        # alive so concurrent calls reuse the same warm TLS sessions
+        configuration.socket_options = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
         ynab_client = ApiClient(configuration)
         logger.info("YNAB API client initialized")
     
     return ynab_client
 
+
+# Deadline (seconds) on the warmup request so joining the thread at
+# interpreter shutdown never blocks for long
+_WARMUP_TIMEOUT = 5
+
+# Handle to the running warmup thread, kept so shutdown can join it
+_warmup_thread: Optional[threading.Thread] = None
+
+
+def _warm_connection():
+    """Open the connection pool with the first identity request.
+
+    The first API call of a session otherwise pays the full TCP and TLS
+    handshake while the user waits on their first tool response; doing
+    it here moves that cost off the critical path. The response primes
+    the memoized user lookup, so the request also serves the first
+    get_user/verify_api_key call instead of being pure overhead. Best
+    effort - a failure just means the first real call connects as
+    before.
+    """
+    try:
+        from ynab.api import user_api
+        response = user_api.UserApi(get_ynab_client()).get_user(
+            _request_timeout=_WARMUP_TIMEOUT
+        )
+        tools.user.prime_user_cache(response.data.user)
+        logger.info("YNAB connection pool warmed")
+    except Exception as e:
+        logger.debug("Connection warmup skipped: %s", e)
+
 # Register all tool modules
 def register_tools():
     """Register all YNAB tools with the MCP server"""
     try:
-        # Register budget tools
-        budgets.register_tools(mcp, get_ynab_client)
-        logger.info("Budget tools registered")
-        
-        # Register account tools
-        accounts.register_tools(mcp, get_ynab_client)
-        logger.info("Account tools registered")
-        
-        # Register transaction tools
-        transactions.register_tools(mcp, get_ynab_client)
-        logger.info("Transaction tools registered")
-        
-        # Register category tools
-        categories.register_tools(mcp, get_ynab_client)
-        logger.info("Category tools registered")
-        
-        # Register payee tools
-        payees.register_tools(mcp, get_ynab_client)
-        logger.info("Payee tools registered")
-        
-        # Register user tools
-        user.register_tools(mcp, get_ynab_client)
-        logger.info("User tools registered")
-        
+        modules = (
+            ("budget", tools.budgets),
+            ("account", tools.accounts),
+            ("transaction", tools.transactions),
+            ("category", tools.categories),
+            ("payee", tools.payees),
+            ("user", tools.user),
+        )
+
+        # Schema generation dominates registration time and the modules are
+        # independent, so build them concurrently; each registers distinct
+        # tool names, so the dict-backed registry needs no extra locking
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(modules)) as executor:
+            futures = {
+                executor.submit(module.register_tools, mcp, get_ynab_client): name
+                for name, module in modules
+            }
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+                logger.info("%s tools registered", futures[future].capitalize())
+
+        register_batch_tools()
+
+        # Prime the HTTPS connection in the background so the first real
+        # tool call reuses an already-open keep-alive socket. The thread
+        # is deliberately non-daemon: on Python <= 3.11 a daemon thread
+        # killed mid-request inside urllib3 aborts the whole process
+        # (SIGABRT) at interpreter shutdown, so instead the interpreter
+        # joins this thread on exit, and the request deadline keeps that
+        # join short
+        global _warmup_thread
+        _warmup_thread = threading.Thread(
+            target=_warm_connection, name="ynab-warmup"
+        )
+        _warmup_thread.start()
+
         logger.info("All YNAB tools registered successfully")
     except Exception as e:
         logger.exception(f"Failed to register tools: {e}")
         raise
 
+def register_batch_tools():
+    """Register tools that compose other tools into one round trip"""
+
+    async def run_tool(tool, arguments: Dict[str, Any]) -> Any:
+        """Invoke a registered tool function, threading sync tools off-loop"""
+        if tool.is_async:
+            return await tool.fn(**arguments)
+        return await asyncio.to_thread(tool.fn, **arguments)
+
+    @mcp.tool()
+    async def batch_execute(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Execute several tool calls in one MCP round trip.
+
+        Calls are grouped into dependency layers; independent calls in the
+        same layer run concurrently against the shared YNAB client.
+
+        Args:
+            calls: List of {"tool": name, "args": {...}, "input_from": {...}}
+                entries. "input_from" maps an argument name to the index of
+                an earlier call whose result supplies it (the named key of
+                that result when present, otherwise the whole result).
+
+        Returns:
+            {"results": [...]} with one entry per call, in input order
+        """
+        try:
+            registry = {
+                tool.name: tool for tool in mcp._tool_manager.list_tools()
+            }
+            deps: List[Dict[str, int]] = []
+            for index, call in enumerate(calls):
+                input_from = call.get("input_from") or {}
+                if any(not 0 <= src_idx < index for src_idx in input_from.values()):
+                    return {
+                        "error": f"call {index}: input_from must reference an earlier call"
+                    }
+                deps.append(input_from)
+
+            results: List[Any] = [None] * len(calls)
+            done: set = set()
+            failed: set = set()
+            while len(done) < len(calls):
+                # Every not-yet-run call whose dependencies are satisfied
+                layer = [
+                    index for index in range(len(calls))
+                    if index not in done
+                    and all(src_idx in done for src_idx in deps[index].values())
+                ]
+
+                async def run_one(index: int) -> Any:
+                    call = calls[index]
+                    name = call.get("tool")
+                    tool = registry.get(name)
+                    if tool is None or name == "batch_execute":
+                        return {"error": f"unknown tool: {name}"}
+                    if any(src_idx in failed for src_idx in deps[index].values()):
+                        return {"error": "skipped: dependency failed"}
+                    arguments = dict(call.get("args") or {})
+                    for arg_name, src_idx in deps[index].items():
+                        source = results[src_idx]
+                        if isinstance(source, dict) and arg_name in source:
+                            arguments[arg_name] = source[arg_name]
+                        else:
+                            arguments[arg_name] = source
+                    return await run_tool(tool, arguments)
+
+                layer_results = await asyncio.gather(
+                    *(run_one(index) for index in layer),
+                    return_exceptions=True
+                )
+                for index, result in zip(layer, layer_results):
+                    if isinstance(result, Exception):
+                        result = {"error": str(result)}
+                    results[index] = result
+                    if isinstance(result, dict) and "error" in result:
+                        failed.add(index)
+                done.update(layer)
+
+            return {"results": results}
+        except Exception as e:
+            logger.exception("Error executing batch: %s", e)
+            return {"error": str(e)}
+
+    @mcp.tool()
+    async def get_budget_snapshot(budget_id: str = "default") -> Dict[str, Any]:
+        """
+        Fetch accounts, categories, payees and transactions in one call.
+
+        The four reads are independent, so they fan out concurrently over
+        the shared client instead of paying one round trip each.
+
+        Args:
+            budget_id: Budget ID, 'last-used', or 'default'
+
+        Returns:
+            {"accounts": ..., "categories": ..., "payees": ..., "transactions": ...}
+        """
+        try:
+            registry = {
+                tool.name: tool for tool in mcp._tool_manager.list_tools()
+            }
+            names = (
+                "get_accounts", "get_categories", "get_payees", "get_transactions"
+            )
+            results = await asyncio.gather(
+                *(run_tool(registry[name], {"budget_id": budget_id}) for name in names),
+                return_exceptions=True
+            )
+            return {
+                name[len("get_"):]: (
+                    {"error": str(result)} if isinstance(result, Exception) else result
+                )
+                for name, result in zip(names, results)
+            }
+        except Exception as e:
+            logger.exception("Error getting budget snapshot: %s", e)
+            return {"error": str(e)}
+
+    logger.info("Batch tools registered")
+
+
 def setup_debug_logging(enabled: bool):
     """Setup debug logging based on command line flag"""
     from .debug_utils import set_logging_enabled
@@ -99,11 +282,6 @@ def setup_debug_logging(enabled: bool):
     else:
         logger.info("Debug tool call logging disabled")
 
-# Initialize tools on startup
-register_tools()
-
-
-
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="YNAB MCP Server")
@@ -113,6 +291,9 @@ if __name__ == "__main__":
     # Setup debug logging based on flag
     setup_debug_logging(args.logging)
     
+    # Register tools only once we're actually starting the server
+    register_tools()
+    
     # Run the server in STDIO mode for Claude Desktop
     try:
         logger.info("Starting YNAB MCP server with STDIO transport")
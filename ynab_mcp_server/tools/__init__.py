@@ -1,12 +1,10 @@
 """
 YNAB MCP Tools Module
+
+Submodules are loaded lazily (PEP 562) so importing the package doesn't
+pull the YNAB SDK models for every domain before they're needed.
 """
-from . import budgets
-from . import accounts
-from . import transactions
-from . import categories
-from . import payees
-from . import user
+import importlib
 
 __all__ = [
     "budgets",
@@ -15,4 +13,12 @@ __all__ = [
     "categories",
     "payees",
     "user"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
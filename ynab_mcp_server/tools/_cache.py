@@ -0,0 +1,41 @@
+"""
+Lightweight in-process TTL cache for read-heavy YNAB tools
+"""
+import time
+from typing import Any, Dict, Hashable, Tuple
+
+
+class TTLCache:
+    """Small dict-backed cache whose entries expire after ttl seconds"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or None if missing/expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        timestamp, value = entry
+        if time.monotonic() - timestamp > self.ttl:
+            del self._data[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting expired/oldest entries if full"""
+        if len(self._data) >= self.maxsize:
+            now = time.monotonic()
+            expired = [k for k, (ts, _) in self._data.items() if now - ts > self.ttl]
+            for k in expired:
+                del self._data[k]
+            # Still full: drop the oldest insertion
+            if len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic(), value)
+
+    def clear(self) -> None:
+        """Drop all cached entries (used by write tools to invalidate reads)"""
+        self._data.clear()
@@ -0,0 +1,91 @@
+"""
+Shared helpers for YNAB MCP tools
+"""
+import functools
+import inspect
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Prefer orjson for parsing raw API payloads when it's available; the
+# stdlib parser is the drop-in fallback so it stays an optional speedup
+try:
+    import orjson
+
+    def json_loads(data):
+        """Parse a JSON bytes/str payload with the fastest available parser"""
+        return orjson.loads(data)
+except ImportError:  # pragma: no cover - depends on optional extra
+    import json
+
+    def json_loads(data):
+        """Parse a JSON bytes/str payload with the fastest available parser"""
+        return json.loads(data)
+
+# Resolved once at import - the environment doesn't change for a running server
+_DEFAULT_BUDGET = os.getenv("DEFAULT_BUDGET_ID") or "last-used"
+
+
+def resolve_budget_id(budget_id: str) -> str:
+    """Resolve 'default' to the configured default budget (or 'last-used')"""
+    return _DEFAULT_BUDGET if budget_id == "default" else budget_id
+
+
+@functools.lru_cache(maxsize=4096)
+def format_milliunits(amount: int) -> str:
+    """Format integer milliunits as a dollar string without float math.
+
+    Memoized because budgets repeat the same handful of amounts (zeros
+    especially) across many rows.
+    """
+    dollars, remainder = divmod(abs(amount), 1000)
+    cents = (remainder + 5) // 10
+    if cents == 100:
+        dollars += 1
+        cents = 0
+    sign = "-" if amount < 0 else ""
+    return f"${sign}{dollars}.{cents:02d}"
+
+
+def log_tool_error(msg: str, e: Exception) -> None:
+    """Log a caught tool error without eagerly rendering a traceback.
+
+    logger.exception always captures and formats the stack; the message
+    alone is enough at ERROR, so the traceback is only attached when
+    DEBUG logging is on.
+    """
+    if logger.isEnabledFor(logging.ERROR):
+        logger.error(
+            "%s: %s", msg, e, exc_info=logger.isEnabledFor(logging.DEBUG)
+        )
+
+
+def tool_errors(msg: str):
+    """Decorator giving every tool the standard failure contract.
+
+    Wraps the tool body so any exception is logged and converted into the
+    {"error": str(e)} shape the tools return, replacing the per-function
+    try/except boilerplate. Async tools get a genuine async wrapper so
+    FastMCP still detects them as coroutine functions.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    log_tool_error(msg, e)
+                    return {"error": str(e)}
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                log_tool_error(msg, e)
+                return {"error": str(e)}
+        return wrapper
+    return decorator
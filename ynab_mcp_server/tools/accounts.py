@@ -1,8 +1,10 @@
 """
 Account-related MCP tools for YNAB
 """
-import os
-from typing import Optional, Any, Dict
+import asyncio
+import functools
+import operator
+from typing import Optional, Any, Dict, List
 from mcp.server.fastmcp import FastMCP
 import ynab
 from ynab.api import accounts_api
@@ -13,23 +15,74 @@ logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import format_milliunits, json_loads, resolve_budget_id, tool_errors
+from ._cache import TTLCache
+
+# Short-lived cache so repeated reads within an agent turn skip the API
+_cache = TTLCache(maxsize=512, ttl=30)
+
+# Last server_knowledge and serialized accounts per budget, so repeat
+# get_accounts calls become cheap delta requests instead of full fetches
+_accounts_state: Dict[str, tuple] = {}
+
+
+# All response fields fetched in one C-level attrgetter call per account
+_ACCOUNT_KEYS = (
+    "id", "name", "type", "on_budget", "closed", "note", "balance",
+    "cleared_balance", "uncleared_balance", "transfer_payee_id",
+    "direct_import_linked", "direct_import_in_error", "deleted"
+)
+_ACCOUNT_GET = operator.attrgetter(*_ACCOUNT_KEYS)
+
+# Account types accepted by YNAB's create-account endpoint
+_VALID_ACCOUNT_TYPES = frozenset({
+    "checking", "savings", "creditCard", "cash", "lineOfCredit",
+    "otherAsset", "otherLiability", "payPal", "merchantAccount",
+    "investmentAccount", "mortgage"
+})
+_VALID_ACCOUNT_TYPES_MSG = (
+    "Invalid account type. Must be one of: "
+    + ", ".join(sorted(_VALID_ACCOUNT_TYPES))
+)
+
+
+def _account_dict(account) -> Dict[str, Any]:
+    """Serialize a ynab Account model into the tool response shape"""
+    return dict(zip(_ACCOUNT_KEYS, _ACCOUNT_GET(account)))
+
+
+def _fetch_accounts_raw(api, budget_id, last_knowledge_of_server):
+    """Fetch /accounts as parsed JSON, skipping pydantic model construction.
+
+    The SDK would build a full Account model per row only for us to flatten
+    it straight back into a dict; the raw payload already has the fields we
+    project, so parse it once and skip the model layer entirely.
+    """
+    response = api.get_accounts_without_preload_content(
+        budget_id=budget_id,
+        last_knowledge_of_server=last_knowledge_of_server
+    )
+    body = response.read()
+    if response.status >= 400:
+        raise ynab.ApiException.from_response(
+            http_resp=response, body=body.decode("utf-8"), data=None
+        )
+    return json_loads(body)["data"]
 
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register account-related tools with the MCP server"""
-    
-    def get_budget_id(budget_id: str) -> str:
-        """Helper to resolve budget ID"""
-        if budget_id == "default":
-            default_budget = os.getenv("DEFAULT_BUDGET_ID")
-            if default_budget:
-                return default_budget
-            return "last-used"
-        return budget_id
+
+    @functools.lru_cache(maxsize=1)
+    def get_accounts_api() -> accounts_api.AccountsApi:
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        return accounts_api.AccountsApi(get_client_func())
     
     @mcp.tool()
     @log_tool_call
-    def get_accounts(
+    @tool_errors("Error getting accounts")
+    async def get_accounts(
         budget_id: str = "default",
         last_knowledge_of_server: Optional[int] = None,
         include_closed: bool = False,
@@ -47,53 +100,59 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             List of accounts with their details, filtered by the specified criteria
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = accounts_api.AccountsApi(api_client)
-                response = api.get_accounts(
-                    budget_id=budget_id,
-                    last_knowledge_of_server=last_knowledge_of_server
-                )
-                
-                accounts_list = []
-                for account in response.data.accounts:
-                    # Filter out closed accounts unless explicitly requested
-                    if account.closed and not include_closed:
-                        continue
-                    
-                    # Filter out deleted accounts unless explicitly requested
-                    if account.deleted and not include_deleted:
-                        continue
-                    
-                    accounts_list.append({
-                        "id": account.id,
-                        "name": account.name,
-                        "type": account.type,
-                        "on_budget": account.on_budget,
-                        "closed": account.closed,
-                        "note": account.note,
-                        "balance": account.balance,
-                        "cleared_balance": account.cleared_balance,
-                        "uncleared_balance": account.uncleared_balance,
-                        "transfer_payee_id": account.transfer_payee_id,
-                        "direct_import_linked": account.direct_import_linked,
-                        "direct_import_in_error": account.direct_import_in_error,
-                        "deleted": account.deleted
-                    })
-                
-                return {
-                    "accounts": accounts_list,
-                    "server_knowledge": response.data.server_knowledge
-                }
-        except Exception as e:
-            logger.exception(f"Error getting accounts: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = (
+            "get_accounts", budget_id, last_knowledge_of_server,
+            include_closed, include_deleted
+        )
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_accounts_api()
+
+        # When the caller has no knowledge of their own, ask YNAB only
+        # for changes since the last snapshot we kept for this budget
+        state = _accounts_state.get(budget_id) if last_knowledge_of_server is None else None
+        request_knowledge = state[0] if state else last_knowledge_of_server
+        data = await asyncio.to_thread(
+            _fetch_accounts_raw, api, budget_id, request_knowledge
+        )
+
+        if state:
+            # Merge the delta into the previous snapshot by account id
+            accounts_by_id = dict(state[1])
+        else:
+            accounts_by_id = {}
+        for account in data["accounts"]:
+            accounts_by_id[account["id"]] = {
+                k: account.get(k) for k in _ACCOUNT_KEYS
+            }
+
+        if last_knowledge_of_server is None:
+            _accounts_state[budget_id] = (
+                data["server_knowledge"], accounts_by_id
+            )
+
+        # Closed/deleted accounts are filtered out unless explicitly requested
+        accounts_list = [
+            account for account in accounts_by_id.values()
+            if (include_closed or not account["closed"])
+            and (include_deleted or not account["deleted"])
+        ]
+
+        result = {
+            "accounts": accounts_list,
+            "server_knowledge": data["server_knowledge"]
+        }
+        _cache.set(cache_key, result)
+        return result
     
     @mcp.tool()
     @log_tool_call
-    def get_account_by_id(
+    @tool_errors("Error getting account")
+    async def get_account_by_id(
         account_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -107,39 +166,78 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Account details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = accounts_api.AccountsApi(api_client)
-                response = api.get_account_by_id(
-                    budget_id=budget_id,
-                    account_id=account_id
-                )
-                
-                account = response.data.account
-                return {
-                    "id": account.id,
-                    "name": account.name,
-                    "type": account.type,
-                    "on_budget": account.on_budget,
-                    "closed": account.closed,
-                    "note": account.note,
-                    "balance": account.balance,
-                    "cleared_balance": account.cleared_balance,
-                    "uncleared_balance": account.uncleared_balance,
-                    "transfer_payee_id": account.transfer_payee_id,
-                    "direct_import_linked": account.direct_import_linked,
-                    "direct_import_in_error": account.direct_import_in_error,
-                    "deleted": account.deleted
-                }
-        except Exception as e:
-            logger.exception(f"Error getting account {account_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_account_by_id", budget_id, account_id)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_accounts_api()
+        response = await asyncio.to_thread(
+            api.get_account_by_id,
+            budget_id=budget_id,
+            account_id=account_id
+        )
+
+        result = _account_dict(response.data.account)
+        _cache.set(cache_key, result)
+        return result
+
+    @mcp.tool()
+    @log_tool_call
+    @tool_errors("Error getting accounts by ids")
+    async def get_accounts_by_ids(
+        account_ids: List[str],
+        budget_id: str = "default"
+    ) -> Dict[str, Any]:
+        """
+        Get several accounts by ID with one concurrent fan-out.
+
+        Args:
+            account_ids: Account IDs to fetch (keep the fan-out modest,
+                e.g. 20 or fewer, to stay within YNAB's rate limit)
+            budget_id: Budget ID, 'last-used', or 'default'
+
+        Returns:
+            Mapping of account ID to account details (or a per-ID error)
+        """
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_accounts_api()
+
+        async def fetch(account_id: str) -> Dict[str, Any]:
+            cache_key = ("get_account_by_id", budget_id, account_id)
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                return cached
+            response = await asyncio.to_thread(
+                api.get_account_by_id,
+                budget_id=budget_id,
+                account_id=account_id
+            )
+            result = _account_dict(response.data.account)
+            _cache.set(cache_key, result)
+            return result
+
+        results = await asyncio.gather(
+            *(fetch(account_id) for account_id in account_ids),
+            return_exceptions=True
+        )
+
+        accounts = {}
+        for account_id, result in zip(account_ids, results):
+            if isinstance(result, Exception):
+                accounts[account_id] = {"error": str(result)}
+            else:
+                accounts[account_id] = result
+
+        return {"accounts": accounts}
     
     @mcp.tool()
     @log_tool_call
-    def create_account(
+    @tool_errors("Error creating account")
+    async def create_account(
         name: str,
         type: str,
         balance: int,
@@ -158,57 +256,50 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Created account details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            # Validate account type
-            valid_types = [
-                "checking", "savings", "creditCard", "cash", "lineOfCredit",
-                "otherAsset", "otherLiability", "payPal", "merchantAccount",
-                "investmentAccount", "mortgage"
-            ]
-            if type not in valid_types:
-                return {
-                    "error": f"Invalid account type. Must be one of: {', '.join(valid_types)}"
-                }
-            
-            with get_client_func() as api_client:
-                api = accounts_api.AccountsApi(api_client)
-                
-                # Create account data
-                account_data = SaveAccount(
-                    name=name,
-                    type=type,
-                    balance=balance
-                )
-                
-                wrapper = PostAccountWrapper(account=account_data)
-                
-                response = api.create_account(
-                    budget_id=budget_id,
-                    data=wrapper
-                )
-                
-                account = response.data.account
-                return {
-                    "id": account.id,
-                    "name": account.name,
-                    "type": account.type,
-                    "on_budget": account.on_budget,
-                    "closed": account.closed,
-                    "balance": account.balance,
-                    "cleared_balance": account.cleared_balance,
-                    "uncleared_balance": account.uncleared_balance,
-                    "transfer_payee_id": account.transfer_payee_id,
-                    "message": "Account created successfully"
-                }
-        except Exception as e:
-            logger.exception(f"Error creating account: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        # Validate account type
+        if type not in _VALID_ACCOUNT_TYPES:
+            return {"error": _VALID_ACCOUNT_TYPES_MSG}
+
+        api = get_accounts_api()
+
+        # Create account data
+        account_data = SaveAccount(
+            name=name,
+            type=type,
+            balance=balance
+        )
+
+        wrapper = PostAccountWrapper(account=account_data)
+
+        response = await asyncio.to_thread(
+            api.create_account,
+            budget_id=budget_id,
+            data=wrapper
+        )
+
+        # A new account invalidates cached account reads
+        _cache.clear()
+
+        account = response.data.account
+        return {
+            "id": account.id,
+            "name": account.name,
+            "type": account.type,
+            "on_budget": account.on_budget,
+            "closed": account.closed,
+            "balance": account.balance,
+            "cleared_balance": account.cleared_balance,
+            "uncleared_balance": account.uncleared_balance,
+            "transfer_payee_id": account.transfer_payee_id,
+            "message": "Account created successfully"
+        }
     
     @mcp.tool()
     @log_tool_call
-    def get_account_balance(
+    @tool_errors("Error getting account balance")
+    async def get_account_balance(
         account_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -222,26 +313,29 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Account balance details in milliunits
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = accounts_api.AccountsApi(api_client)
-                response = api.get_account_by_id(
-                    budget_id=budget_id,
-                    account_id=account_id
-                )
-                
-                account = response.data.account
-                return {
-                    "account_name": account.name,
-                    "balance": account.balance,
-                    "cleared_balance": account.cleared_balance,
-                    "uncleared_balance": account.uncleared_balance,
-                    "balance_formatted": f"${account.balance / 1000:.2f}",
-                    "cleared_balance_formatted": f"${account.cleared_balance / 1000:.2f}",
-                    "uncleared_balance_formatted": f"${account.uncleared_balance / 1000:.2f}"
-                }
-        except Exception as e:
-            logger.exception(f"Error getting account balance for {account_id}: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_account_balance", budget_id, account_id)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_accounts_api()
+        response = await asyncio.to_thread(
+            api.get_account_by_id,
+            budget_id=budget_id,
+            account_id=account_id
+        )
+
+        account = response.data.account
+        result = {
+            "account_name": account.name,
+            "balance": account.balance,
+            "cleared_balance": account.cleared_balance,
+            "uncleared_balance": account.uncleared_balance,
+            "balance_formatted": format_milliunits(account.balance),
+            "cleared_balance_formatted": format_milliunits(account.cleared_balance),
+            "uncleared_balance_formatted": format_milliunits(account.uncleared_balance)
+        }
+        _cache.set(cache_key, result)
+        return result
\ No newline at end of file
@@ -1,7 +1,9 @@
 """
 Budget-related MCP tools for YNAB
 """
-import os
+import asyncio
+import functools
+import operator
 from typing import Optional, Any, Dict
 from mcp.server.fastmcp import FastMCP
 import ynab
@@ -12,13 +14,183 @@ logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import json_loads, log_tool_error, resolve_budget_id
+from ._cache import TTLCache
+
+# Budget settings (date and currency formats) essentially never change
+# mid-session, so they get a longer TTL than the data caches
+_settings_cache = TTLCache(maxsize=16, ttl=300)
+
+# Row projections for the nested budget payloads, each pulled with one
+# C-level attrgetter call per model instead of per-field lookups
+_SUMMARY_ACCOUNT_KEYS = (
+    "id", "name", "type", "on_budget", "closed", "balance",
+    "cleared_balance", "uncleared_balance"
+)
+_SUMMARY_ACCOUNT_GET = operator.attrgetter(*_SUMMARY_ACCOUNT_KEYS)
+
+_DETAIL_ACCOUNT_KEYS = _SUMMARY_ACCOUNT_KEYS + ("transfer_payee_id", "deleted")
+
+_CATEGORY_KEYS = (
+    "id", "name", "hidden", "note", "budgeted", "activity", "balance", "deleted"
+)
+
+_PAYEE_KEYS = ("id", "name", "transfer_account_id", "deleted")
+
+_MONTH_KEYS = (
+    "month", "income", "budgeted", "activity", "to_be_budgeted", "deleted"
+)
+
+_CURRENCY_KEYS = (
+    "iso_code", "example_format", "decimal_digits", "decimal_separator",
+    "symbol_first", "group_separator", "currency_symbol", "display_symbol"
+)
+_CURRENCY_GET = operator.attrgetter(*_CURRENCY_KEYS)
+
+
+def _currency_dict(currency_format) -> Optional[Dict[str, Any]]:
+    """Serialize an optional CurrencyFormat model (None stays None)"""
+    if currency_format is None:
+        return None
+    return dict(zip(_CURRENCY_KEYS, _CURRENCY_GET(currency_format)))
+
+
+# Last server_knowledge and merged budget snapshot per budget, so repeat
+# get_budget_by_id calls become cheap delta requests instead of refetching
+# the entire budget payload
+_budget_state: Dict[str, tuple] = {}
+
+
+def _new_budget_snapshot() -> Dict[str, Any]:
+    """Empty per-budget snapshot with one map per entity section.
+
+    category_index maps category id -> group id so a merge can evict a
+    moved category from its old group; it is internal merge state and
+    never part of the assembled response.
+    """
+    return {
+        "meta": {},
+        "accounts": {},
+        "category_groups": {},
+        "payees": {},
+        "months": {},
+        "category_index": {},
+    }
+
+
+def _fetch_budget_raw(api, budget_id, last_knowledge_of_server):
+    """Fetch /budgets/{id} as parsed JSON, skipping model construction.
+
+    A full budget payload can carry thousands of account, category and
+    payee rows; the SDK would validate a pydantic model for each one
+    only for us to flatten it straight back into a dict, so parse the
+    payload once and merge the plain dicts instead.
+    """
+    response = api.get_budget_by_id_without_preload_content(
+        budget_id=budget_id,
+        last_knowledge_of_server=last_knowledge_of_server
+    )
+    body = response.read()
+    if response.status >= 400:
+        raise ynab.ApiException.from_response(
+            http_resp=response, body=body.decode("utf-8"), data=None
+        )
+    return json_loads(body)["data"]
+
+
+def _merge_budget(snapshot: Dict[str, Any], budget: Dict[str, Any]) -> None:
+    """Merge a raw budget payload (full or delta) into a snapshot.
+
+    Delta responses only carry changed entities, so each section updates
+    the stored map by id; unchanged rows survive from the last fetch.
+    """
+    snapshot["meta"] = {
+        "id": budget["id"],
+        "name": budget["name"],
+        "last_modified_on": budget.get("last_modified_on"),
+    }
+    for acc in budget.get("accounts") or ():
+        snapshot["accounts"][acc["id"]] = {
+            k: acc.get(k) for k in _DETAIL_ACCOUNT_KEYS
+        }
+    for group in budget.get("category_groups") or ():
+        stored = snapshot["category_groups"].get(group["id"])
+        snapshot["category_groups"][group["id"]] = {
+            "id": group["id"],
+            "name": group["name"],
+            "hidden": group.get("hidden"),
+            "deleted": group.get("deleted"),
+            "categories": stored["categories"] if stored else {},
+        }
+    # The detail payload carries categories as a flat list keyed by
+    # category_group_id rather than nested under their groups. Deltas
+    # routinely send a changed category without re-sending its
+    # unchanged group, so fall back to a stub group entry instead of
+    # dropping the row
+    cat_index = snapshot["category_index"]
+    for cat in budget.get("categories") or ():
+        group_id = cat.get("category_group_id")
+        # A delta re-files a moved category under its new group without
+        # mentioning the old one; evict the stale copy first
+        prev_group_id = cat_index.get(cat["id"])
+        if prev_group_id is not None and prev_group_id != group_id:
+            prev = snapshot["category_groups"].get(prev_group_id)
+            if prev is not None:
+                prev["categories"].pop(cat["id"], None)
+        group = snapshot["category_groups"].get(group_id)
+        if group is None:
+            group = {
+                "id": group_id,
+                "name": None,
+                "hidden": None,
+                "deleted": None,
+                "categories": {},
+            }
+            snapshot["category_groups"][group_id] = group
+        group["categories"][cat["id"]] = {k: cat.get(k) for k in _CATEGORY_KEYS}
+        cat_index[cat["id"]] = group_id
+    for payee in budget.get("payees") or ():
+        snapshot["payees"][payee["id"]] = {k: payee.get(k) for k in _PAYEE_KEYS}
+    for month in budget.get("months") or ():
+        snapshot["months"][month["month"]] = {
+            k: month.get(k) for k in _MONTH_KEYS
+        }
+
+
+def _assemble_budget(snapshot: Dict[str, Any], server_knowledge) -> Dict[str, Any]:
+    """Project a merged snapshot back into the tool response shape.
+
+    Built as one expression so the dict is sized up front rather than
+    grown through a series of conditional insertions.
+    """
+    accounts = snapshot["accounts"]
+    groups = snapshot["category_groups"]
+    payees = snapshot["payees"]
+    months = snapshot["months"]
+    return {
+        **snapshot["meta"],
+        "server_knowledge": server_knowledge,
+        **({"accounts": list(accounts.values())} if accounts else {}),
+        **({"category_groups": [
+            dict(group, categories=list(group["categories"].values()))
+            for group in groups.values()
+        ]} if groups else {}),
+        **({"payees": list(payees.values())} if payees else {}),
+        **({"months": list(months.values())} if months else {}),
+    }
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register budget-related tools with the MCP server"""
+
+    @functools.lru_cache(maxsize=1)
+    def get_budgets_api() -> budgets_api.BudgetsApi:
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        return budgets_api.BudgetsApi(get_client_func())
     
     @mcp.tool()
     @log_tool_call
-    def get_budgets(include_accounts: bool = False) -> Dict[str, Any]:
+    async def get_budgets(include_accounts: bool = False) -> Dict[str, Any]:
         """
         Get list of budgets for the authenticated user.
         
@@ -29,56 +201,44 @@ def register_tools(mcp: FastMCP, get_client_func):
             List of budget summaries
         """
         try:
-            with get_client_func() as api_client:
-                api = budgets_api.BudgetsApi(api_client)
-                response = api.get_budgets(include_accounts=include_accounts)
-                
-                budgets_list = []
-                for budget in response.data.budgets:
-                    budget_dict = {
-                        "id": budget.id,
-                        "name": budget.name,
-                        "last_modified_on": budget.last_modified_on.isoformat() if budget.last_modified_on else None,
-                        "date_format": budget.date_format.format if budget.date_format else None,
-                        "currency_format": {
-                            "iso_code": budget.currency_format.iso_code,
-                            "example_format": budget.currency_format.example_format,
-                            "decimal_digits": budget.currency_format.decimal_digits,
-                            "decimal_separator": budget.currency_format.decimal_separator,
-                            "symbol_first": budget.currency_format.symbol_first,
-                            "group_separator": budget.currency_format.group_separator,
-                            "currency_symbol": budget.currency_format.currency_symbol,
-                            "display_symbol": budget.currency_format.display_symbol
-                        } if budget.currency_format else None
-                    }
-                    
-                    if include_accounts and budget.accounts:
-                        budget_dict["accounts"] = [
-                            {
-                                "id": acc.id,
-                                "name": acc.name,
-                                "type": acc.type,
-                                "on_budget": acc.on_budget,
-                                "closed": acc.closed,
-                                "balance": acc.balance,
-                                "cleared_balance": acc.cleared_balance,
-                                "uncleared_balance": acc.uncleared_balance
-                            } for acc in budget.accounts
-                        ]
-                    
-                    budgets_list.append(budget_dict)
-                
-                return {
-                    "budgets": budgets_list,
-                    "default_budget": response.data.default_budget.id if response.data.default_budget else None
+            api = get_budgets_api()
+            response = await asyncio.to_thread(
+                api.get_budgets, include_accounts=include_accounts
+            )
+
+            budgets_list = []
+            for budget in response.data.budgets:
+                # Bind the optional attributes to locals once per row
+                # instead of re-reading them for each conditional
+                lmo = budget.last_modified_on
+                date_format = budget.date_format
+                budget_dict = {
+                    "id": budget.id,
+                    "name": budget.name,
+                    "last_modified_on": lmo.isoformat() if lmo else None,
+                    "date_format": date_format.format if date_format else None,
+                    "currency_format": _currency_dict(budget.currency_format)
                 }
+
+                if include_accounts and budget.accounts:
+                    budget_dict["accounts"] = [
+                        dict(zip(_SUMMARY_ACCOUNT_KEYS, _SUMMARY_ACCOUNT_GET(acc)))
+                        for acc in budget.accounts
+                    ]
+
+                budgets_list.append(budget_dict)
+
+            return {
+                "budgets": budgets_list,
+                "default_budget": response.data.default_budget.id if response.data.default_budget else None
+            }
         except Exception as e:
-            logger.exception(f"Error getting budgets: {e}")
+            log_tool_error("Error getting budgets", e)
             return {"error": str(e)}
     
     @mcp.tool()
     @log_tool_call
-    def get_budget_by_id(
+    async def get_budget_by_id(
         budget_id: str,
         last_knowledge_of_server: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -94,100 +254,52 @@ def register_tools(mcp: FastMCP, get_client_func):
         """
         try:
             # Use default budget if configured and no specific ID provided
-            if budget_id == "default":
-                default_budget = os.getenv("DEFAULT_BUDGET_ID")
-                if default_budget:
-                    budget_id = default_budget
-                else:
-                    budget_id = "last-used"
-            
-            with get_client_func() as api_client:
-                api = budgets_api.BudgetsApi(api_client)
-                response = api.get_budget_by_id(
-                    budget_id=budget_id,
-                    last_knowledge_of_server=last_knowledge_of_server
+            budget_id = resolve_budget_id(budget_id)
+
+            api = get_budgets_api()
+
+            # Caller-supplied knowledge is a deliberate delta request;
+            # pass it straight through instead of serving the snapshot
+            if last_knowledge_of_server is not None:
+                data = await asyncio.to_thread(
+                    _fetch_budget_raw, api, budget_id, last_knowledge_of_server
                 )
-                
-                budget = response.data.budget
-                budget_dict = {
-                    "id": budget.id,
-                    "name": budget.name,
-                    "last_modified_on": budget.last_modified_on.isoformat() if budget.last_modified_on else None,
-                    "server_knowledge": response.data.server_knowledge
-                }
-                
-                # Include accounts
-                if budget.accounts:
-                    budget_dict["accounts"] = [
-                        {
-                            "id": acc.id,
-                            "name": acc.name,
-                            "type": acc.type,
-                            "on_budget": acc.on_budget,
-                            "closed": acc.closed,
-                            "balance": acc.balance,
-                            "cleared_balance": acc.cleared_balance,
-                            "uncleared_balance": acc.uncleared_balance,
-                            "transfer_payee_id": acc.transfer_payee_id,
-                            "deleted": acc.deleted
-                        } for acc in budget.accounts
-                    ]
-                
-                # Include category groups with categories
-                if budget.category_groups:
-                    budget_dict["category_groups"] = [
-                        {
-                            "id": group.id,
-                            "name": group.name,
-                            "hidden": group.hidden,
-                            "deleted": group.deleted,
-                            "categories": [
-                                {
-                                    "id": cat.id,
-                                    "name": cat.name,
-                                    "hidden": cat.hidden,
-                                    "note": cat.note,
-                                    "budgeted": cat.budgeted,
-                                    "activity": cat.activity,
-                                    "balance": cat.balance,
-                                    "deleted": cat.deleted
-                                } for cat in (group.categories or [])
-                            ]
-                        } for group in budget.category_groups
-                    ]
-                
-                # Include payees
-                if budget.payees:
-                    budget_dict["payees"] = [
-                        {
-                            "id": payee.id,
-                            "name": payee.name,
-                            "transfer_account_id": payee.transfer_account_id,
-                            "deleted": payee.deleted
-                        } for payee in budget.payees
-                    ]
-                
-                # Include months
-                if budget.months:
-                    budget_dict["months"] = [
-                        {
-                            "month": month.month,
-                            "income": month.income,
-                            "budgeted": month.budgeted,
-                            "activity": month.activity,
-                            "to_be_budgeted": month.to_be_budgeted,
-                            "deleted": month.deleted
-                        } for month in budget.months
-                    ]
-                
-                return budget_dict
+                snapshot = _new_budget_snapshot()
+                # Seed the groups the delta's categories reference with
+                # metadata from the stored snapshot, so they keep their
+                # real names instead of stub entries
+                state = _budget_state.get(budget_id)
+                if state:
+                    stored_groups = state[1]["category_groups"]
+                    for cat in data["budget"].get("categories") or ():
+                        group = stored_groups.get(cat.get("category_group_id"))
+                        if group is not None:
+                            snapshot["category_groups"][group["id"]] = dict(
+                                group, categories={}
+                            )
+                _merge_budget(snapshot, data["budget"])
+                return _assemble_budget(snapshot, data["server_knowledge"])
+
+            # Ask YNAB only for changes since the last snapshot we kept
+            # for this budget and merge them in, section by section
+            state = _budget_state.get(budget_id)
+            data = await asyncio.to_thread(
+                _fetch_budget_raw, api, budget_id, state[0] if state else None
+            )
+
+            snapshot = state[1] if state else _new_budget_snapshot()
+            _merge_budget(snapshot, data["budget"])
+
+            server_knowledge = data["server_knowledge"]
+            _budget_state[budget_id] = (server_knowledge, snapshot)
+            return _assemble_budget(snapshot, server_knowledge)
         except Exception as e:
-            logger.exception(f"Error getting budget {budget_id}: {e}")
+            log_tool_error(f"Error getting budget {budget_id}", e)
             return {"error": str(e)}
     
     @mcp.tool()
     @log_tool_call
-    def get_budget_settings(budget_id: str) -> Dict[str, Any]:
+    async def get_budget_settings(budget_id: str) -> Dict[str, Any]:
         """
         Get settings for a specific budget.
         
@@ -198,33 +310,26 @@ def register_tools(mcp: FastMCP, get_client_func):
             Budget settings including date format and currency format
         """
         try:
-            if budget_id == "default":
-                default_budget = os.getenv("DEFAULT_BUDGET_ID")
-                if default_budget:
-                    budget_id = default_budget
-                else:
-                    budget_id = "last-used"
-            
-            with get_client_func() as api_client:
-                api = budgets_api.BudgetsApi(api_client)
-                response = api.get_budget_settings_by_id(budget_id=budget_id)
-                
-                settings = response.data.settings
-                return {
-                    "date_format": {
-                        "format": settings.date_format.format
-                    } if settings.date_format else None,
-                    "currency_format": {
-                        "iso_code": settings.currency_format.iso_code,
-                        "example_format": settings.currency_format.example_format,
-                        "decimal_digits": settings.currency_format.decimal_digits,
-                        "decimal_separator": settings.currency_format.decimal_separator,
-                        "symbol_first": settings.currency_format.symbol_first,
-                        "group_separator": settings.currency_format.group_separator,
-                        "currency_symbol": settings.currency_format.currency_symbol,
-                        "display_symbol": settings.currency_format.display_symbol
-                    } if settings.currency_format else None
-                }
+            budget_id = resolve_budget_id(budget_id)
+
+            cached = _settings_cache.get(budget_id)
+            if cached is not None:
+                return cached
+
+            api = get_budgets_api()
+            response = await asyncio.to_thread(
+                api.get_budget_settings_by_id, budget_id=budget_id
+            )
+
+            settings = response.data.settings
+            result = {
+                "date_format": {
+                    "format": settings.date_format.format
+                } if settings.date_format else None,
+                "currency_format": _currency_dict(settings.currency_format)
+            }
+            _settings_cache.set(budget_id, result)
+            return result
         except Exception as e:
-            logger.exception(f"Error getting budget settings for {budget_id}: {e}")
+            log_tool_error(f"Error getting budget settings for {budget_id}", e)
             return {"error": str(e)}
\ No newline at end of file
@@ -1,8 +1,10 @@
 """
 Category-related MCP tools for YNAB
 """
-import os
-from typing import Optional, Any, Dict
+import asyncio
+import functools
+import operator
+from typing import Optional, Any, Dict, List
 from mcp.server.fastmcp import FastMCP
 import ynab
 from ynab.api import categories_api
@@ -13,22 +15,94 @@ logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import format_milliunits as _fmt_milli
+from ._util import json_loads, resolve_budget_id, tool_errors
+from ._cache import TTLCache
+
+# Short-lived cache so repeated reads within an agent turn skip the API
+_cache = TTLCache(maxsize=512, ttl=30)
+
+# Last server_knowledge, serialized category groups, and a category-id ->
+# group-id index per budget, so repeat get_categories calls become cheap
+# delta requests; the index lets a merge re-file a moved category instead
+# of leaving a stale copy in its old group
+_categories_state: Dict[str, tuple] = {}
+
+
+# All plain response fields fetched in one C-level attrgetter call per category
+_CATEGORY_KEYS = (
+    "id", "name", "hidden", "note", "budgeted", "activity", "balance",
+    "goal_type", "goal_creation_month", "goal_target", "goal_target_month",
+    "goal_percentage_complete", "deleted"
+)
+_CATEGORY_GET = operator.attrgetter(*_CATEGORY_KEYS)
+
+
+
+def _category_dict(cat) -> Dict[str, Any]:
+    """Serialize a ynab Category model into the get_categories row shape.
+
+    The bulk listing intentionally omits the "*_formatted" display strings:
+    the raw milliunit integers are already present and most rows are never
+    read by the caller. Single-category tools still include them.
+    """
+    return dict(zip(_CATEGORY_KEYS, _CATEGORY_GET(cat)))
+
+
+def _category_detail(cat) -> Dict[str, Any]:
+    """Serialize a single ynab Category model with display strings included"""
+    return {
+        "id": cat.id,
+        "category_group_id": cat.category_group_id,
+        "category_group_name": cat.category_group_name,
+        "name": cat.name,
+        "hidden": cat.hidden,
+        "note": cat.note,
+        "budgeted": cat.budgeted,
+        "budgeted_formatted": _fmt_milli(cat.budgeted),
+        "activity": cat.activity,
+        "activity_formatted": _fmt_milli(cat.activity),
+        "balance": cat.balance,
+        "balance_formatted": _fmt_milli(cat.balance),
+        "goal_type": cat.goal_type,
+        "goal_creation_month": cat.goal_creation_month,
+        "goal_target": cat.goal_target,
+        "goal_target_month": cat.goal_target_month,
+        "goal_percentage_complete": cat.goal_percentage_complete,
+        "deleted": cat.deleted
+    }
+
+
+def _fetch_categories_raw(api, budget_id, last_knowledge_of_server):
+    """Fetch /categories as parsed JSON, skipping pydantic model construction.
+
+    Mirrors _fetch_accounts_raw in accounts.py: the raw payload already has
+    every field we project, so parse it once and skip the model layer.
+    """
+    response = api.get_categories_without_preload_content(
+        budget_id=budget_id,
+        last_knowledge_of_server=last_knowledge_of_server
+    )
+    body = response.read()
+    if response.status >= 400:
+        raise ynab.ApiException.from_response(
+            http_resp=response, body=body.decode("utf-8"), data=None
+        )
+    return json_loads(body)["data"]
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register category-related tools with the MCP server"""
-    
-    def get_budget_id(budget_id: str) -> str:
-        """Helper to resolve budget ID"""
-        if budget_id == "default":
-            default_budget = os.getenv("DEFAULT_BUDGET_ID")
-            if default_budget:
-                return default_budget
-            return "last-used"
-        return budget_id
+
+    @functools.lru_cache(maxsize=1)
+    def get_categories_api() -> categories_api.CategoriesApi:
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        return categories_api.CategoriesApi(get_client_func())
     
     @mcp.tool()
     @log_tool_call
-    def get_categories(
+    @tool_errors("Error getting categories")
+    async def get_categories(
         budget_id: str = "default",
         last_knowledge_of_server: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -42,60 +116,83 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Category groups with their categories
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-                response = api.get_categories(
-                    budget_id=budget_id,
-                    last_knowledge_of_server=last_knowledge_of_server
-                )
-                
-                category_groups = []
-                for group in response.data.category_groups:
-                    group_dict = {
-                        "id": group.id,
-                        "name": group.name,
-                        "hidden": group.hidden,
-                        "deleted": group.deleted,
-                        "categories": []
-                    }
-                    
-                    if group.categories:
-                        for cat in group.categories:
-                            group_dict["categories"].append({
-                                "id": cat.id,
-                                "name": cat.name,
-                                "hidden": cat.hidden,
-                                "note": cat.note,
-                                "budgeted": cat.budgeted,
-                                "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                                "activity": cat.activity,
-                                "activity_formatted": f"${cat.activity / 1000:.2f}",
-                                "balance": cat.balance,
-                                "balance_formatted": f"${cat.balance / 1000:.2f}",
-                                "goal_type": cat.goal_type,
-                                "goal_creation_month": cat.goal_creation_month,
-                                "goal_target": cat.goal_target,
-                                "goal_target_month": cat.goal_target_month,
-                                "goal_percentage_complete": cat.goal_percentage_complete,
-                                "deleted": cat.deleted
-                            })
-                    
-                    category_groups.append(group_dict)
-                
-                return {
-                    "category_groups": category_groups,
-                    "server_knowledge": response.data.server_knowledge
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_categories", budget_id, last_knowledge_of_server)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_categories_api()
+
+        # When the caller has no knowledge of their own, ask YNAB only
+        # for changes since the last snapshot we kept for this budget
+        state = _categories_state.get(budget_id) if last_knowledge_of_server is None else None
+        request_knowledge = state[0] if state else last_knowledge_of_server
+        data = await asyncio.to_thread(
+            _fetch_categories_raw, api, budget_id, request_knowledge
+        )
+
+        if state:
+            groups_by_id = {
+                group_id: (dict(meta), dict(cats))
+                for group_id, (meta, cats) in state[1].items()
+            }
+            cat_index = dict(state[2])
+        else:
+            groups_by_id = {}
+            cat_index = {}
+
+        # Merge (or build) the per-group metadata and categories by id
+        for group in data["category_groups"]:
+            meta, cats = groups_by_id.get(group["id"], ({}, {}))
+            meta.update({
+                "id": group["id"],
+                "name": group["name"],
+                "hidden": group["hidden"],
+                "deleted": group["deleted"]
+            })
+            for cat in (group.get("categories") or []):
+                # A delta re-files a moved category under its new group
+                # without mentioning the old one; evict the stale copy
+                prev_group_id = cat_index.pop(cat["id"], None)
+                if prev_group_id is not None and prev_group_id != group["id"]:
+                    prev = groups_by_id.get(prev_group_id)
+                    if prev is not None:
+                        prev[1].pop(cat["id"], None)
+                # Deltas tombstone removed rows with deleted=true; a full
+                # fetch never returns them, so the kept snapshot drops
+                # them too (deliberate delta requests pass them through)
+                if cat.get("deleted") and last_knowledge_of_server is None:
+                    cats.pop(cat["id"], None)
+                    continue
+                cats[cat["id"]] = {
+                    k: cat.get(k) for k in _CATEGORY_KEYS
                 }
-        except Exception as e:
-            logger.exception(f"Error getting categories: {e}")
-            return {"error": str(e)}
+                cat_index[cat["id"]] = group["id"]
+            groups_by_id[group["id"]] = (meta, cats)
+
+        if last_knowledge_of_server is None:
+            _categories_state[budget_id] = (
+                data["server_knowledge"], groups_by_id, cat_index
+            )
+
+        category_groups = [
+            dict(meta, categories=list(cats.values()))
+            for meta, cats in groups_by_id.values()
+        ]
+
+        result = {
+            "category_groups": category_groups,
+            "server_knowledge": data["server_knowledge"]
+        }
+        _cache.set(cache_key, result)
+        return result
     
     @mcp.tool()
     @log_tool_call
-    def get_category_by_id(
+    @tool_errors("Error getting category")
+    async def get_category_by_id(
         category_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -109,44 +206,78 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Category details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-                response = api.get_category_by_id(
-                    budget_id=budget_id,
-                    category_id=category_id
-                )
-                
-                cat = response.data.category
-                return {
-                    "id": cat.id,
-                    "category_group_id": cat.category_group_id,
-                    "category_group_name": cat.category_group_name,
-                    "name": cat.name,
-                    "hidden": cat.hidden,
-                    "note": cat.note,
-                    "budgeted": cat.budgeted,
-                    "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                    "activity": cat.activity,
-                    "activity_formatted": f"${cat.activity / 1000:.2f}",
-                    "balance": cat.balance,
-                    "balance_formatted": f"${cat.balance / 1000:.2f}",
-                    "goal_type": cat.goal_type,
-                    "goal_creation_month": cat.goal_creation_month,
-                    "goal_target": cat.goal_target,
-                    "goal_target_month": cat.goal_target_month,
-                    "goal_percentage_complete": cat.goal_percentage_complete,
-                    "deleted": cat.deleted
-                }
-        except Exception as e:
-            logger.exception(f"Error getting category {category_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_category_by_id", budget_id, category_id)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_categories_api()
+        response = await asyncio.to_thread(
+            api.get_category_by_id,
+            budget_id=budget_id,
+            category_id=category_id
+        )
+
+        result = _category_detail(response.data.category)
+        _cache.set(cache_key, result)
+        return result
+
+    @mcp.tool()
+    @log_tool_call
+    @tool_errors("Error getting categories by ids")
+    async def get_categories_by_ids(
+        category_ids: List[str],
+        budget_id: str = "default"
+    ) -> Dict[str, Any]:
+        """
+        Get several categories by ID with one concurrent fan-out.
+
+        Args:
+            category_ids: Category IDs to fetch (keep the fan-out modest,
+                e.g. 20 or fewer, to stay within YNAB's rate limit)
+            budget_id: Budget ID, 'last-used', or 'default'
+
+        Returns:
+            Mapping of category ID to category details (or a per-ID error)
+        """
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_categories_api()
+
+        async def fetch(category_id: str) -> Dict[str, Any]:
+            cache_key = ("get_category_by_id", budget_id, category_id)
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                return cached
+            response = await asyncio.to_thread(
+                api.get_category_by_id,
+                budget_id=budget_id,
+                category_id=category_id
+            )
+            result = _category_detail(response.data.category)
+            _cache.set(cache_key, result)
+            return result
+
+        results = await asyncio.gather(
+            *(fetch(category_id) for category_id in category_ids),
+            return_exceptions=True
+        )
+
+        categories = {}
+        for category_id, result in zip(category_ids, results):
+            if isinstance(result, Exception):
+                categories[category_id] = {"error": str(result)}
+            else:
+                categories[category_id] = result
+
+        return {"categories": categories}
     
     @mcp.tool()
     @log_tool_call
-    def get_month_category(
+    @tool_errors("Error getting month category")
+    async def get_month_category(
         category_id: str,
         month: str,
         budget_id: str = "default"
@@ -162,44 +293,48 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Category details for the specified month
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-                response = api.get_month_category_by_id(
-                    budget_id=budget_id,
-                    month=month,
-                    category_id=category_id
-                )
-                
-                cat = response.data.category
-                return {
-                    "id": cat.id,
-                    "category_group_id": cat.category_group_id,
-                    "category_group_name": cat.category_group_name,
-                    "name": cat.name,
-                    "hidden": cat.hidden,
-                    "note": cat.note,
-                    "budgeted": cat.budgeted,
-                    "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                    "activity": cat.activity,
-                    "activity_formatted": f"${cat.activity / 1000:.2f}",
-                    "balance": cat.balance,
-                    "balance_formatted": f"${cat.balance / 1000:.2f}",
-                    "goal_type": cat.goal_type,
-                    "goal_target": cat.goal_target,
-                    "goal_target_month": cat.goal_target_month,
-                    "goal_percentage_complete": cat.goal_percentage_complete,
-                    "deleted": cat.deleted
-                }
-        except Exception as e:
-            logger.exception(f"Error getting month category {category_id} for {month}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_month_category", budget_id, category_id, month)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_categories_api()
+        response = await asyncio.to_thread(
+            api.get_month_category_by_id,
+            budget_id=budget_id,
+            month=month,
+            category_id=category_id
+        )
+
+        cat = response.data.category
+        result = {
+            "id": cat.id,
+            "category_group_id": cat.category_group_id,
+            "category_group_name": cat.category_group_name,
+            "name": cat.name,
+            "hidden": cat.hidden,
+            "note": cat.note,
+            "budgeted": cat.budgeted,
+            "budgeted_formatted": _fmt_milli(cat.budgeted),
+            "activity": cat.activity,
+            "activity_formatted": _fmt_milli(cat.activity),
+            "balance": cat.balance,
+            "balance_formatted": _fmt_milli(cat.balance),
+            "goal_type": cat.goal_type,
+            "goal_target": cat.goal_target,
+            "goal_target_month": cat.goal_target_month,
+            "goal_percentage_complete": cat.goal_percentage_complete,
+            "deleted": cat.deleted
+        }
+        _cache.set(cache_key, result)
+        return result
     
     @mcp.tool()
     @log_tool_call
-    def update_category(
+    @tool_errors("Error updating category")
+    async def update_category(
         category_id: str,
         name: Optional[str] = None,
         note: Optional[str] = None,
@@ -221,53 +356,53 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Updated category details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-
-                # Create update data
-                update_data = {}
-                if name is not None:
-                    update_data["name"] = name
-                if note is not None:
-                    update_data["note"] = note
-                if hidden is not None:
-                    update_data["hidden"] = hidden
-                if goal_target is not None:
-                    update_data["goal_target"] = goal_target
-
-                category_data = SaveCategory(**update_data)
-                wrapper = PatchCategoryWrapper(category=category_data)
-                
-                response = api.update_category(
-                    budget_id=budget_id,
-                    category_id=category_id,
-                    data=wrapper
-                )
-                
-                cat = response.data.category
-                return {
-                    "id": cat.id,
-                    "name": cat.name,
-                    "hidden": cat.hidden,
-                    "note": cat.note,
-                    "budgeted": cat.budgeted,
-                    "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                    "activity": cat.activity,
-                    "activity_formatted": f"${cat.activity / 1000:.2f}",
-                    "balance": cat.balance,
-                    "balance_formatted": f"${cat.balance / 1000:.2f}",
-                    "message": "Category updated successfully"
-                }
-        except Exception as e:
-            logger.exception(f"Error updating category {category_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_categories_api()
+
+        # Create update data
+        update_data = {}
+        if name is not None:
+            update_data["name"] = name
+        if note is not None:
+            update_data["note"] = note
+        if hidden is not None:
+            update_data["hidden"] = hidden
+        if goal_target is not None:
+            update_data["goal_target"] = goal_target
+
+        category_data = SaveCategory(**update_data)
+        wrapper = PatchCategoryWrapper(category=category_data)
+
+        response = await asyncio.to_thread(
+            api.update_category,
+            budget_id=budget_id,
+            category_id=category_id,
+            data=wrapper
+        )
+
+        # Category changed, drop any cached category reads
+        _cache.clear()
+
+        cat = response.data.category
+        return {
+            "id": cat.id,
+            "name": cat.name,
+            "hidden": cat.hidden,
+            "note": cat.note,
+            "budgeted": cat.budgeted,
+            "budgeted_formatted": _fmt_milli(cat.budgeted),
+            "activity": cat.activity,
+            "activity_formatted": _fmt_milli(cat.activity),
+            "balance": cat.balance,
+            "balance_formatted": _fmt_milli(cat.balance),
+            "message": "Category updated successfully"
+        }
     
     @mcp.tool()
     @log_tool_call
-    def update_month_category(
+    @tool_errors("Error updating month category")
+    async def update_month_category(
         category_id: str,
         month: str,
         budgeted: int,
@@ -285,42 +420,42 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Updated category details for the month
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-                
-                category_data = SaveMonthCategory(budgeted=budgeted)
-                wrapper = PatchMonthCategoryWrapper(category=category_data)
-                
-                response = api.update_month_category(
-                    budget_id=budget_id,
-                    month=month,
-                    category_id=category_id,
-                    data=wrapper
-                )
-                
-                cat = response.data.category
-                return {
-                    "id": cat.id,
-                    "name": cat.name,
-                    "month": month,
-                    "budgeted": cat.budgeted,
-                    "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                    "activity": cat.activity,
-                    "activity_formatted": f"${cat.activity / 1000:.2f}",
-                    "balance": cat.balance,
-                    "balance_formatted": f"${cat.balance / 1000:.2f}",
-                    "message": f"Category budget updated for {month}"
-                }
-        except Exception as e:
-            logger.exception(f"Error updating month category {category_id} for {month}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_categories_api()
+
+        category_data = SaveMonthCategory(budgeted=budgeted)
+        wrapper = PatchMonthCategoryWrapper(category=category_data)
+
+        response = await asyncio.to_thread(
+            api.update_month_category,
+            budget_id=budget_id,
+            month=month,
+            category_id=category_id,
+            data=wrapper
+        )
+
+        # Budgeted amount changed, drop any cached category reads
+        _cache.clear()
+
+        cat = response.data.category
+        return {
+            "id": cat.id,
+            "name": cat.name,
+            "month": month,
+            "budgeted": cat.budgeted,
+            "budgeted_formatted": _fmt_milli(cat.budgeted),
+            "activity": cat.activity,
+            "activity_formatted": _fmt_milli(cat.activity),
+            "balance": cat.balance,
+            "balance_formatted": _fmt_milli(cat.balance),
+            "message": f"Category budget updated for {month}"
+        }
     
     @mcp.tool()
     @log_tool_call
-    def get_category_balance(
+    @tool_errors("Error getting category balance")
+    async def get_category_balance(
         category_id: str,
         month: Optional[str] = None,
         budget_id: str = "default"
@@ -336,37 +471,34 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Category balance information
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = categories_api.CategoriesApi(api_client)
-                
-                if month:
-                    response = api.get_month_category_by_id(
-                        budget_id=budget_id,
-                        month=month,
-                        category_id=category_id
-                    )
-                else:
-                    response = api.get_category_by_id(
-                        budget_id=budget_id,
-                        category_id=category_id
-                    )
-                
-                cat = response.data.category
-                return {
-                    "category_name": cat.name,
-                    "month": month if month else "current",
-                    "budgeted": cat.budgeted,
-                    "budgeted_formatted": f"${cat.budgeted / 1000:.2f}",
-                    "activity": cat.activity,
-                    "activity_formatted": f"${cat.activity / 1000:.2f}",
-                    "balance": cat.balance,
-                    "balance_formatted": f"${cat.balance / 1000:.2f}",
-                    "available": cat.balance,
-                    "available_formatted": f"${cat.balance / 1000:.2f}"
-                }
-        except Exception as e:
-            logger.exception(f"Error getting category balance for {category_id}: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+        budget_id = resolve_budget_id(budget_id)
+
+        cache_key = ("get_category_balance", budget_id, category_id, month)
+        cached = _cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        api = get_categories_api()
+
+        # Tuple-indexed dispatch between the current and per-month endpoints
+        fetch = (api.get_category_by_id, api.get_month_category_by_id)[bool(month)]
+        kwargs = {"budget_id": budget_id, "category_id": category_id}
+        if month:
+            kwargs["month"] = month
+        response = await asyncio.to_thread(fetch, **kwargs)
+
+        cat = response.data.category
+        result = {
+            "category_name": cat.name,
+            "month": month if month else "current",
+            "budgeted": cat.budgeted,
+            "budgeted_formatted": _fmt_milli(cat.budgeted),
+            "activity": cat.activity,
+            "activity_formatted": _fmt_milli(cat.activity),
+            "balance": cat.balance,
+            "balance_formatted": _fmt_milli(cat.balance),
+            "available": cat.balance,
+            "available_formatted": _fmt_milli(cat.balance)
+        }
+        _cache.set(cache_key, result)
+        return result
\ No newline at end of file
@@ -1,34 +1,133 @@
 """
 Payee-related MCP tools for YNAB
 """
-import os
+import asyncio
+import functools
 from typing import Optional, Any, Dict
 from mcp.server.fastmcp import FastMCP
-import ynab
-from ynab.api import payees_api, payee_locations_api
-from ynab.models import PatchPayeeWrapper, SavePayee
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import resolve_budget_id, tool_errors
+from ._cache import TTLCache
+
+# Short-lived cache so repeated payee reads within an agent turn skip the API
+_cache = TTLCache(maxsize=128, ttl=30)
+
+# Last server_knowledge and serialized payees per budget, so refreshes are
+# cheap delta requests merged into the previous snapshot
+_payees_state: Dict[str, tuple] = {}
+
+# Prebuilt (lowercased name, payee dict) rows per budget so search_payees
+# is a tight substring scan instead of lowering every name per query
+_payees_index: Dict[str, list] = {}
+
+_PAYEE_KEYS = ("id", "name", "transfer_account_id", "deleted")
+
+
+def _payee_dict(payee) -> Dict[str, Any]:
+    """Serialize a ynab Payee model into the tool response shape"""
+    return {
+        "id": payee.id,
+        "name": payee.name,
+        "transfer_account_id": payee.transfer_account_id,
+        "deleted": payee.deleted
+    }
+
+
+def _location_dict(location) -> Dict[str, Any]:
+    """Serialize a ynab PayeeLocation model into the tool response shape"""
+    return {
+        "id": location.id,
+        "payee_id": location.payee_id,
+        "latitude": location.latitude,
+        "longitude": location.longitude,
+        "deleted": location.deleted
+    }
+
+
+# Registration is idempotent: a repeat call (tests, reloads) would make
+# FastMCP re-introspect every signature and rebuild every schema
+_REGISTERED = False
+
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register payee-related tools with the MCP server"""
-    
-    def get_budget_id(budget_id: str) -> str:
-        """Helper to resolve budget ID"""
-        if budget_id == "default":
-            default_budget = os.getenv("DEFAULT_BUDGET_ID")
-            if default_budget:
-                return default_budget
-            return "last-used"
-        return budget_id
+    global _REGISTERED
+    if _REGISTERED:
+        return
+    _REGISTERED = True
+
+    @functools.lru_cache(maxsize=1)
+    def get_payees_api():
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        from ynab.api import payees_api
+        return payees_api.PayeesApi(get_client_func())
+
+    @functools.lru_cache(maxsize=1)
+    def get_payee_locations_api():
+        """Singleton PayeeLocationsApi bound to the shared client"""
+        from ynab.api import payee_locations_api
+        return payee_locations_api.PayeeLocationsApi(get_client_func())
+
+
+    async def get_payees_by_id(api, budget_id: str) -> tuple:
+        """Return (payees_by_id, server_knowledge) for a budget.
+
+        Serves from the TTL cache when fresh; on a miss, requests only the
+        delta since the last snapshot and merges it by payee id.
+        """
+        cached = _cache.get(("payees", budget_id))
+        if cached is not None:
+            return cached
+
+        state = _payees_state.get(budget_id)
+        response = await asyncio.to_thread(
+            api.get_payees,
+            budget_id=budget_id,
+            last_knowledge_of_server=state[0] if state else None
+        )
+
+        payees_by_id = dict(state[1]) if state else {}
+        for payee in response.data.payees:
+            payees_by_id[payee.id] = _payee_dict(payee)
+
+        server_knowledge = response.data.server_knowledge
+        _payees_state[budget_id] = (server_knowledge, payees_by_id)
+        _payees_index[budget_id] = [
+            (payee["name"].lower(), payee)
+            for payee in payees_by_id.values() if not payee["deleted"]
+        ]
+        result = (payees_by_id, server_knowledge)
+        _cache.set(("payees", budget_id), result)
+        return result
+
+    async def get_all_locations(budget_id: str) -> list:
+        """Return every payee location for a budget, cached for the TTL.
+
+        The full location set is small, so one fetch serves both listing
+        and the per-payee grouping below.
+        """
+        cached = _cache.get(("payee_locations", budget_id))
+        if cached is not None:
+            return cached
+
+        api = get_payee_locations_api()
+        response = await asyncio.to_thread(
+            api.get_payee_locations, budget_id=budget_id
+        )
+        locations = list(map(_location_dict, response.data.payee_locations))
+        _cache.set(("payee_locations", budget_id), locations)
+        return locations
     
     @mcp.tool()
     @log_tool_call
-    def get_payees(
+    @tool_errors("Error getting payees")
+    async def get_payees(
         budget_id: str = "default",
         last_knowledge_of_server: Optional[int] = None
     ) -> Dict[str, Any]:
@@ -42,36 +141,33 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             List of payees
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payees_api.PayeesApi(api_client)
-                response = api.get_payees(
-                    budget_id=budget_id,
-                    last_knowledge_of_server=last_knowledge_of_server
-                )
-                
-                payees_list = []
-                for payee in response.data.payees:
-                    payees_list.append({
-                        "id": payee.id,
-                        "name": payee.name,
-                        "transfer_account_id": payee.transfer_account_id,
-                        "deleted": payee.deleted
-                    })
-                
-                return {
-                    "payees": payees_list,
-                    "server_knowledge": response.data.server_knowledge
-                }
-        except Exception as e:
-            logger.exception(f"Error getting payees: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_payees_api()
+
+        # Caller-supplied knowledge is a deliberate delta request; pass
+        # it straight through instead of serving the merged snapshot
+        if last_knowledge_of_server is not None:
+            response = await asyncio.to_thread(
+                api.get_payees,
+                budget_id=budget_id,
+                last_knowledge_of_server=last_knowledge_of_server
+            )
+            return {
+                "payees": [_payee_dict(p) for p in response.data.payees],
+                "server_knowledge": response.data.server_knowledge
+            }
+
+        payees_by_id, server_knowledge = await get_payees_by_id(api, budget_id)
+        return {
+            "payees": list(payees_by_id.values()),
+            "server_knowledge": server_knowledge
+        }
     
     @mcp.tool()
     @log_tool_call
-    def get_payee_by_id(
+    @tool_errors("Error getting payee")
+    async def get_payee_by_id(
         payee_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -85,30 +181,26 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Payee details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payees_api.PayeesApi(api_client)
-                response = api.get_payee_by_id(
-                    budget_id=budget_id,
-                    payee_id=payee_id
-                )
-                
-                payee = response.data.payee
-                return {
-                    "id": payee.id,
-                    "name": payee.name,
-                    "transfer_account_id": payee.transfer_account_id,
-                    "deleted": payee.deleted
-                }
-        except Exception as e:
-            logger.exception(f"Error getting payee {payee_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        # Serve from the cached payee snapshot when it's still fresh
+        cached = _cache.get(("payees", budget_id))
+        if cached is not None and payee_id in cached[0]:
+            return cached[0][payee_id]
+
+        api = get_payees_api()
+        response = await asyncio.to_thread(
+            api.get_payee_by_id,
+            budget_id=budget_id,
+            payee_id=payee_id
+        )
+
+        return _payee_dict(response.data.payee)
     
     @mcp.tool()
     @log_tool_call
-    def update_payee(
+    @tool_errors("Error updating payee")
+    async def update_payee(
         payee_id: str,
         name: str,
         budget_id: str = "default"
@@ -124,36 +216,34 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Updated payee details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payees_api.PayeesApi(api_client)
-                
-                payee_data = SavePayee(name=name)
-                wrapper = PatchPayeeWrapper(payee=payee_data)
-                
-                response = api.update_payee(
-                    budget_id=budget_id,
-                    payee_id=payee_id,
-                    data=wrapper
-                )
-                
-                payee = response.data.payee
-                return {
-                    "id": payee.id,
-                    "name": payee.name,
-                    "transfer_account_id": payee.transfer_account_id,
-                    "deleted": payee.deleted,
-                    "message": "Payee updated successfully"
-                }
-        except Exception as e:
-            logger.exception(f"Error updating payee {payee_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_payees_api()
+
+        from ynab.models import PatchPayeeWrapper, SavePayee
+
+        payee_data = SavePayee(name=name)
+        wrapper = PatchPayeeWrapper(payee=payee_data)
+
+        response = await asyncio.to_thread(
+            api.update_payee,
+            budget_id=budget_id,
+            payee_id=payee_id,
+            data=wrapper
+        )
+
+        # The rename invalidates any cached snapshot for this budget
+        _cache.clear()
+        _payees_state.pop(budget_id, None)
+        _payees_index.pop(budget_id, None)
+
+        payee = response.data.payee
+        return dict(_payee_dict(payee), message="Payee updated successfully")
     
     @mcp.tool()
     @log_tool_call
-    def get_payee_locations(
+    @tool_errors("Error getting payee locations")
+    async def get_payee_locations(
         budget_id: str = "default"
     ) -> Dict[str, Any]:
         """
@@ -165,31 +255,14 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             List of payee locations
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payee_locations_api.PayeeLocationsApi(api_client)
-                response = api.get_payee_locations(budget_id=budget_id)
-                
-                locations_list = []
-                for location in response.data.payee_locations:
-                    locations_list.append({
-                        "id": location.id,
-                        "payee_id": location.payee_id,
-                        "latitude": location.latitude,
-                        "longitude": location.longitude,
-                        "deleted": location.deleted
-                    })
-                
-                return {"payee_locations": locations_list}
-        except Exception as e:
-            logger.exception(f"Error getting payee locations: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        return {"payee_locations": await get_all_locations(budget_id)}
     
     @mcp.tool()
     @log_tool_call
-    def get_payee_location_by_id(
+    @tool_errors("Error getting payee location")
+    async def get_payee_location_by_id(
         payee_location_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -203,31 +276,21 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Payee location details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payee_locations_api.PayeeLocationsApi(api_client)
-                response = api.get_payee_location_by_id(
-                    budget_id=budget_id,
-                    payee_location_id=payee_location_id
-                )
-                
-                location = response.data.payee_location
-                return {
-                    "id": location.id,
-                    "payee_id": location.payee_id,
-                    "latitude": location.latitude,
-                    "longitude": location.longitude,
-                    "deleted": location.deleted
-                }
-        except Exception as e:
-            logger.exception(f"Error getting payee location {payee_location_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_payee_locations_api()
+        response = await asyncio.to_thread(
+            api.get_payee_location_by_id,
+            budget_id=budget_id,
+            payee_location_id=payee_location_id
+        )
+
+        return _location_dict(response.data.payee_location)
     
     @mcp.tool()
     @log_tool_call
-    def get_payee_locations_by_payee(
+    @tool_errors("Error getting locations for payee")
+    async def get_payee_locations_by_payee(
         payee_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -241,37 +304,26 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             List of locations for the payee
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payee_locations_api.PayeeLocationsApi(api_client)
-                response = api.get_payee_locations_by_payee(
-                    budget_id=budget_id,
-                    payee_id=payee_id
-                )
-                
-                locations_list = []
-                for location in response.data.payee_locations:
-                    locations_list.append({
-                        "id": location.id,
-                        "payee_id": location.payee_id,
-                        "latitude": location.latitude,
-                        "longitude": location.longitude,
-                        "deleted": location.deleted
-                    })
-                
-                return {
-                    "payee_id": payee_id,
-                    "locations": locations_list
-                }
-        except Exception as e:
-            logger.exception(f"Error getting locations for payee {payee_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        # One cached full fetch grouped by payee replaces a network
+        # round trip per payee
+        grouped = _cache.get(("payee_locations_by_payee", budget_id))
+        if grouped is None:
+            grouped = {}
+            for location in await get_all_locations(budget_id):
+                grouped.setdefault(location["payee_id"], []).append(location)
+            _cache.set(("payee_locations_by_payee", budget_id), grouped)
+
+        return {
+            "payee_id": payee_id,
+            "locations": grouped.get(payee_id, [])
+        }
     
     @mcp.tool()
     @log_tool_call
-    def search_payees(
+    @tool_errors("Error searching payees")
+    async def search_payees(
         search_term: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -285,31 +337,20 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             List of matching payees
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = payees_api.PayeesApi(api_client)
-                response = api.get_payees(budget_id=budget_id)
-                
-                # Filter payees by search term (case-insensitive)
-                search_lower = search_term.lower()
-                matching_payees = []
-                
-                for payee in response.data.payees:
-                    if search_lower in payee.name.lower():
-                        matching_payees.append({
-                            "id": payee.id,
-                            "name": payee.name,
-                            "transfer_account_id": payee.transfer_account_id,
-                            "deleted": payee.deleted
-                        })
-                
-                return {
-                    "search_term": search_term,
-                    "matches": matching_payees,
-                    "count": len(matching_payees)
-                }
-        except Exception as e:
-            logger.exception(f"Error searching payees: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_payees_api()
+        await get_payees_by_id(api, budget_id)
+
+        # Scan the prebuilt lowercase index (case-insensitive match)
+        search_lower = search_term.lower()
+        matching_payees = [
+            payee for name_lower, payee in _payees_index.get(budget_id, ())
+            if search_lower in name_lower
+        ]
+
+        return {
+            "search_term": search_term,
+            "matches": matching_payees,
+            "count": len(matching_payees)
+        }
\ No newline at end of file
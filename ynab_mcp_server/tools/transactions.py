@@ -1,44 +1,120 @@
 """
 Transaction-related MCP tools for YNAB
 """
-import os
+import asyncio
+import functools
 from typing import Optional, Any, Dict
 from datetime import date, datetime
 from mcp.server.fastmcp import FastMCP
 import ynab
-from ynab.api import transactions_api
-from ynab.models import (
-    PostTransactionsWrapper,
-    SaveTransactionWithOptionalFields,
-    PutTransactionWrapper,
-    ExistingTransaction,
-)
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import format_milliunits, json_loads, resolve_budget_id, tool_errors
+from . import accounts, categories
+
+# Accepted enum values for the write endpoints, with pre-joined messages
+_VALID_CLEARED = frozenset({"cleared", "uncleared", "reconciled"})
+_VALID_FLAGS = frozenset({"red", "orange", "yellow", "green", "blue", "purple"})
+_VALID_CLEARED_MSG = "cleared must be 'cleared', 'uncleared', or 'reconciled'"
+_VALID_FLAGS_MSG = "flag_color must be one of: " + ", ".join(sorted(_VALID_FLAGS))
+
+# Response row projection; to_dict() emits API aliases, so the SDK's
+# var_date field is already named "date" here
+_TXN_KEYS = (
+    "id", "date", "amount", "memo", "cleared", "approved", "flag_color",
+    "account_id", "account_name", "payee_id", "payee_name",
+    "category_id", "category_name", "transfer_account_id",
+    "import_id", "deleted", "subtransactions"
+)
+
+
+def _txn_row(trans: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a raw transaction dict into the tool response shape"""
+    row = {key: trans.get(key) for key in _TXN_KEYS}
+    row["amount_formatted"] = format_milliunits(row["amount"])
+    return row
+
+
+def _fetch_transactions_raw(api, budget_id, since_date, type,
+                            last_knowledge_of_server):
+    """Fetch /transactions as parsed JSON, skipping model construction.
+
+    Transaction lists are the largest payloads this server handles; the
+    raw rows already carry every projected key (with date as an ISO
+    string), so one parse replaces a pydantic model per row.
+    """
+    response = api.get_transactions_without_preload_content(
+        budget_id=budget_id,
+        since_date=since_date,
+        type=type,
+        last_knowledge_of_server=last_knowledge_of_server
+    )
+    body = response.read()
+    if response.status >= 400:
+        raise ynab.ApiException.from_response(
+            http_resp=response, body=body.decode("utf-8"), data=None
+        )
+    return json_loads(body)["data"]
+
+
+def _txn_dict(trans) -> Dict[str, Any]:
+    """Serialize a ynab TransactionDetail model into the tool response shape.
+
+    One pydantic model_dump replaces ~18 Python-level attribute reads; the
+    projection restores keys that exclude_none dropped.
+    """
+    data = trans.to_dict()
+    row = {key: data.get(key) for key in _TXN_KEYS}
+    if row["date"] is not None:
+        row["date"] = row["date"].isoformat()
+    row["amount_formatted"] = format_milliunits(row["amount"])
+    return row
+
+
+def _invalidate_balance_caches() -> None:
+    """Drop cached account and category reads after a transaction write.
+
+    Writes move account balances and category activity, so the sibling
+    modules' TTL caches must not keep serving the old rows. Their delta
+    snapshots stay - the next fetch picks up the changes from the API.
+    """
+    accounts._cache.clear()
+    categories._cache.clear()
+
+
+# Registration is idempotent: a repeat call (tests, reloads) would make
+# FastMCP re-introspect every signature and rebuild every schema
+_REGISTERED = False
+
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register transaction-related tools with the MCP server"""
-    
-    def get_budget_id(budget_id: str) -> str:
-        """Helper to resolve budget ID"""
-        if budget_id == "default":
-            default_budget = os.getenv("DEFAULT_BUDGET_ID")
-            if default_budget:
-                return default_budget
-            return "last-used"
-        return budget_id
+    global _REGISTERED
+    if _REGISTERED:
+        return
+    _REGISTERED = True
+
+    @functools.lru_cache(maxsize=1)
+    def get_transactions_api():
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        from ynab.api import transactions_api
+        return transactions_api.TransactionsApi(get_client_func())
+
     
     @mcp.tool()
     @log_tool_call
-    def get_transactions(
+    @tool_errors("Error getting transactions")
+    async def get_transactions(
         budget_id: str = "default",
         since_date: Optional[str] = None,
         type: Optional[str] = None,
-        last_knowledge_of_server: Optional[int] = None
+        last_knowledge_of_server: Optional[int] = None,
+        limit: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Get transactions for a budget.
@@ -48,56 +124,41 @@ def register_tools(mcp: FastMCP, get_client_func):
             since_date: Filter transactions on or after this date (ISO format: YYYY-MM-DD)
             type: Filter by type: 'uncategorized' or 'unapproved'
             last_knowledge_of_server: The starting server knowledge for delta requests
+            limit: Maximum number of transactions to return (keeps the most recent rows)
             
         Returns:
             List of transactions
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-                response = api.get_transactions(
-                    budget_id=budget_id,
-                    since_date=since_date,
-                    type=type,
-                    last_knowledge_of_server=last_knowledge_of_server
-                )
-                
-                transactions_list = []
-                for trans in response.data.transactions:
-                    transactions_list.append({
-                        "id": trans.id,
-                        "date": trans.var_date.isoformat() if trans.var_date else None,
-                        "amount": trans.amount,
-                        "amount_formatted": f"${trans.amount / 1000:.2f}",
-                        "memo": trans.memo,
-                        "cleared": trans.cleared,
-                        "approved": trans.approved,
-                        "flag_color": trans.flag_color,
-                        "account_id": trans.account_id,
-                        "account_name": trans.account_name,
-                        "payee_id": trans.payee_id,
-                        "payee_name": trans.payee_name,
-                        "category_id": trans.category_id,
-                        "category_name": trans.category_name,
-                        "transfer_account_id": trans.transfer_account_id,
-                        "import_id": trans.import_id,
-                        "deleted": trans.deleted,
-                        "subtransactions": trans.subtransactions
-                    })
-                
-                return {
-                    "transactions": transactions_list,
-                    "server_knowledge": response.data.server_knowledge
-                }
-        except Exception as e:
-            logger.exception(f"Error getting transactions: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_transactions_api()
+        data = await asyncio.to_thread(
+            _fetch_transactions_raw, api, budget_id, since_date, type,
+            last_knowledge_of_server
+        )
+
+        transactions = data["transactions"]
+        total_count = len(transactions)
+        if limit is not None:
+            # YNAB returns transactions in ascending date order, so the
+            # most recent rows - the ones a caller capping output wants -
+            # are at the tail
+            transactions = transactions[-limit:] if limit > 0 else []
+
+        transactions_list = [
+            _txn_row(trans) for trans in transactions
+        ]
+
+        return {
+            "transactions": transactions_list,
+            "total_count": total_count,
+            "server_knowledge": data["server_knowledge"]
+        }
     
     @mcp.tool()
     @log_tool_call
-    def get_transaction_by_id(
+    @tool_errors("Error getting transaction")
+    async def get_transaction_by_id(
         transaction_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -111,44 +172,21 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Transaction details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-                response = api.get_transaction_by_id(
-                    budget_id=budget_id,
-                    transaction_id=transaction_id
-                )
-                
-                trans = response.data.transaction
-                return {
-                    "id": trans.id,
-                    "date": trans.var_date.isoformat() if trans.var_date else None,
-                    "amount": trans.amount,
-                    "amount_formatted": f"${trans.amount / 1000:.2f}",
-                    "memo": trans.memo,
-                    "cleared": trans.cleared,
-                    "approved": trans.approved,
-                    "flag_color": trans.flag_color,
-                    "account_id": trans.account_id,
-                    "account_name": trans.account_name,
-                    "payee_id": trans.payee_id,
-                    "payee_name": trans.payee_name,
-                    "category_id": trans.category_id,
-                    "category_name": trans.category_name,
-                    "transfer_account_id": trans.transfer_account_id,
-                    "import_id": trans.import_id,
-                    "deleted": trans.deleted,
-                    "subtransactions": trans.subtransactions
-                }
-        except Exception as e:
-            logger.exception(f"Error getting transaction {transaction_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_transactions_api()
+        response = await asyncio.to_thread(
+            api.get_transaction_by_id,
+            budget_id=budget_id,
+            transaction_id=transaction_id
+        )
+
+        return _txn_dict(response.data.transaction)
     
     @mcp.tool()
     @log_tool_call
-    def create_transaction(
+    @tool_errors("Error creating transaction")
+    async def create_transaction(
         account_id: str,
         amount: int,
         date: str,
@@ -180,65 +218,68 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Created transaction details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            # Validate cleared status
-            if cleared not in ["cleared", "uncleared", "reconciled"]:
-                return {"error": "cleared must be 'cleared', 'uncleared', or 'reconciled'"}
-            
-            # Validate flag color if provided
-            valid_flags = ["red", "orange", "yellow", "green", "blue", "purple"]
-            if flag_color and flag_color not in valid_flags:
-                return {"error": f"flag_color must be one of: {', '.join(valid_flags)}"}
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-                
-                # Create transaction data
-                transaction_data = SaveTransactionWithOptionalFields(
-                    account_id=account_id,
-                    amount=amount,
-                    date=date,
-                    payee_name=payee_name,
-                    payee_id=payee_id,
-                    category_id=category_id,
-                    cleared=cleared,
-                    approved=approved,
-                    memo=memo,
-                    flag_color=flag_color
-                )
-                
-                wrapper = PostTransactionsWrapper(transaction=transaction_data)
-                
-                response = api.create_transaction(
-                    budget_id=budget_id,
-                    data=wrapper
-                )
-                
-                if response.data.transaction:
-                    trans = response.data.transaction
-                    return {
-                        "id": trans.id,
-                        "date": trans.var_date.isoformat() if trans.var_date else None,
-                        "amount": trans.amount,
-                        "amount_formatted": f"${trans.amount / 1000:.2f}",
-                        "payee_name": trans.payee_name,
-                        "category_name": trans.category_name,
-                        "memo": trans.memo,
-                        "cleared": trans.cleared,
-                        "approved": trans.approved,
-                        "message": "Transaction created successfully"
-                    }
-                else:
-                    return {"message": "Transaction created", "duplicate_import_ids": response.data.duplicate_import_ids}
-        except Exception as e:
-            logger.exception(f"Error creating transaction: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        # Validate cleared status
+        if cleared not in _VALID_CLEARED:
+            return {"error": _VALID_CLEARED_MSG}
+
+        # Validate flag color if provided
+        if flag_color and flag_color not in _VALID_FLAGS:
+            return {"error": _VALID_FLAGS_MSG}
+
+        api = get_transactions_api()
+
+        from ynab.models import (
+            PostTransactionsWrapper,
+            SaveTransactionWithOptionalFields,
+        )
+
+        # Create transaction data
+        transaction_data = SaveTransactionWithOptionalFields(
+            account_id=account_id,
+            amount=amount,
+            date=date,
+            payee_name=payee_name,
+            payee_id=payee_id,
+            category_id=category_id,
+            cleared=cleared,
+            approved=approved,
+            memo=memo,
+            flag_color=flag_color
+        )
+
+        wrapper = PostTransactionsWrapper(transaction=transaction_data)
+
+        response = await asyncio.to_thread(
+            api.create_transaction,
+            budget_id=budget_id,
+            data=wrapper
+        )
+
+        _invalidate_balance_caches()
+
+        if response.data.transaction:
+            trans = response.data.transaction
+            return {
+                "id": trans.id,
+                "date": trans.var_date.isoformat() if trans.var_date else None,
+                "amount": trans.amount,
+                "amount_formatted": format_milliunits(trans.amount),
+                "payee_name": trans.payee_name,
+                "category_name": trans.category_name,
+                "memo": trans.memo,
+                "cleared": trans.cleared,
+                "approved": trans.approved,
+                "message": "Transaction created successfully"
+            }
+        else:
+            return {"message": "Transaction created", "duplicate_import_ids": response.data.duplicate_import_ids}
     
     @mcp.tool()
     @log_tool_call
-    def update_transaction(
+    @tool_errors("Error updating transaction")
+    async def update_transaction(
         transaction_id: str,
         account_id: Optional[str] = None,
         amount: Optional[int] = None,
@@ -272,65 +313,66 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Updated transaction details
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-
-                # Create update data with only provided fields
-                # Note: ExistingTransaction uses 'var_date' not 'date'
-                update_data = {}
-                if account_id is not None:
-                    update_data["account_id"] = account_id
-                if amount is not None:
-                    update_data["amount"] = amount
-                if date is not None:
-                    update_data["var_date"] = date
-                if payee_name is not None:
-                    update_data["payee_name"] = payee_name
-                if payee_id is not None:
-                    update_data["payee_id"] = payee_id
-                if category_id is not None:
-                    update_data["category_id"] = category_id
-                if cleared is not None:
-                    update_data["cleared"] = cleared
-                if approved is not None:
-                    update_data["approved"] = approved
-                if memo is not None:
-                    update_data["memo"] = memo
-                if flag_color is not None:
-                    update_data["flag_color"] = flag_color
-
-                transaction_data = ExistingTransaction(**update_data)
-                wrapper = PutTransactionWrapper(transaction=transaction_data)
-                
-                response = api.update_transaction(
-                    budget_id=budget_id,
-                    transaction_id=transaction_id,
-                    data=wrapper
-                )
-                
-                trans = response.data.transaction
-                return {
-                    "id": trans.id,
-                    "date": trans.var_date.isoformat() if trans.var_date else None,
-                    "amount": trans.amount,
-                    "amount_formatted": f"${trans.amount / 1000:.2f}",
-                    "payee_name": trans.payee_name,
-                    "category_name": trans.category_name,
-                    "memo": trans.memo,
-                    "cleared": trans.cleared,
-                    "approved": trans.approved,
-                    "message": "Transaction updated successfully"
-                }
-        except Exception as e:
-            logger.exception(f"Error updating transaction {transaction_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_transactions_api()
+
+        # Create update data with only provided fields
+        # Note: ExistingTransaction uses 'var_date' not 'date'
+        update_data = {}
+        if account_id is not None:
+            update_data["account_id"] = account_id
+        if amount is not None:
+            update_data["amount"] = amount
+        if date is not None:
+            update_data["var_date"] = date
+        if payee_name is not None:
+            update_data["payee_name"] = payee_name
+        if payee_id is not None:
+            update_data["payee_id"] = payee_id
+        if category_id is not None:
+            update_data["category_id"] = category_id
+        if cleared is not None:
+            update_data["cleared"] = cleared
+        if approved is not None:
+            update_data["approved"] = approved
+        if memo is not None:
+            update_data["memo"] = memo
+        if flag_color is not None:
+            update_data["flag_color"] = flag_color
+
+        from ynab.models import ExistingTransaction, PutTransactionWrapper
+
+        transaction_data = ExistingTransaction(**update_data)
+        wrapper = PutTransactionWrapper(transaction=transaction_data)
+
+        response = await asyncio.to_thread(
+            api.update_transaction,
+            budget_id=budget_id,
+            transaction_id=transaction_id,
+            data=wrapper
+        )
+
+        _invalidate_balance_caches()
+
+        trans = response.data.transaction
+        return {
+            "id": trans.id,
+            "date": trans.var_date.isoformat() if trans.var_date else None,
+            "amount": trans.amount,
+            "amount_formatted": format_milliunits(trans.amount),
+            "payee_name": trans.payee_name,
+            "category_name": trans.category_name,
+            "memo": trans.memo,
+            "cleared": trans.cleared,
+            "approved": trans.approved,
+            "message": "Transaction updated successfully"
+        }
     
     @mcp.tool()
     @log_tool_call
-    def delete_transaction(
+    @tool_errors("Error deleting transaction")
+    async def delete_transaction(
         transaction_id: str,
         budget_id: str = "default"
     ) -> Dict[str, Any]:
@@ -344,29 +386,28 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Deletion confirmation
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-                response = api.delete_transaction(
-                    budget_id=budget_id,
-                    transaction_id=transaction_id
-                )
-                
-                trans = response.data.transaction
-                return {
-                    "id": trans.id,
-                    "deleted": True,
-                    "message": f"Transaction {trans.id} deleted successfully"
-                }
-        except Exception as e:
-            logger.exception(f"Error deleting transaction {transaction_id}: {e}")
-            return {"error": str(e)}
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_transactions_api()
+        response = await asyncio.to_thread(
+            api.delete_transaction,
+            budget_id=budget_id,
+            transaction_id=transaction_id
+        )
+
+        _invalidate_balance_caches()
+
+        trans = response.data.transaction
+        return {
+            "id": trans.id,
+            "deleted": True,
+            "message": f"Transaction {trans.id} deleted successfully"
+        }
     
     @mcp.tool()
     @log_tool_call
-    def import_transactions(
+    @tool_errors("Error importing transactions")
+    async def import_transactions(
         budget_id: str = "default"
     ) -> Dict[str, Any]:
         """
@@ -378,18 +419,17 @@ def register_tools(mcp: FastMCP, get_client_func):
         Returns:
             Import results including number of imported transactions
         """
-        try:
-            budget_id = get_budget_id(budget_id)
-            
-            with get_client_func() as api_client:
-                api = transactions_api.TransactionsApi(api_client)
-                response = api.import_transactions(budget_id=budget_id)
-                
-                return {
-                    "transaction_ids": response.data.transaction_ids,
-                    "count": len(response.data.transaction_ids) if response.data.transaction_ids else 0,
-                    "message": f"Imported {len(response.data.transaction_ids) if response.data.transaction_ids else 0} transactions"
-                }
-        except Exception as e:
-            logger.exception(f"Error importing transactions: {e}")
-            return {"error": str(e)}
\ No newline at end of file
+        budget_id = resolve_budget_id(budget_id)
+
+        api = get_transactions_api()
+        response = await asyncio.to_thread(
+            api.import_transactions, budget_id=budget_id
+        )
+
+        _invalidate_balance_caches()
+
+        return {
+            "transaction_ids": response.data.transaction_ids,
+            "count": len(response.data.transaction_ids) if response.data.transaction_ids else 0,
+            "message": f"Imported {len(response.data.transaction_ids) if response.data.transaction_ids else 0} transactions"
+        }
\ No newline at end of file
@@ -1,23 +1,64 @@
 """
 User-related MCP tools for YNAB
 """
-from typing import Any, Dict
+import asyncio
+import functools
+from typing import Optional, Any, Dict
 from mcp.server.fastmcp import FastMCP
 import ynab
 from ynab.api import user_api
+from ynab.models.user import User
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Import the logging decorator
 from ..debug_utils import log_tool_call
+from ._util import log_tool_error
+
+# The authenticated identity is fixed for the life of the process (one
+# API key), so the first successful lookup serves every later call;
+# failures are never cached, so a bad key is retried on the next call
+_user_cache: Optional[Dict[str, Any]] = None
+
+# The generated User model has a fixed schema, so probe it once at import
+# instead of paying hasattr's try/except on every lookup
+_USER_HAS_NAME = "name" in User.model_fields
+
+
+def prime_user_cache(user) -> Dict[str, Any]:
+    """Store a fetched User model so later lookups skip the API.
+
+    Also called by the server's startup warmup, so the request that
+    opens the connection pool doubles as the first identity fetch.
+    """
+    global _user_cache
+    _user_cache = {
+        "id": user.id,
+        "name": user.name if _USER_HAS_NAME else None
+    }
+    return _user_cache
+
 
 def register_tools(mcp: FastMCP, get_client_func):
     """Register user-related tools with the MCP server"""
-    
+
+    @functools.lru_cache(maxsize=1)
+    def get_user_api() -> user_api.UserApi:
+        """The API wrapper is a stateless view over the singleton client;
+        build it once and reuse it for every tool call."""
+        return user_api.UserApi(get_client_func())
+
+    async def get_cached_user() -> Dict[str, Any]:
+        """Return the authenticated user, fetching it at most once"""
+        if _user_cache is None:
+            response = await asyncio.to_thread(get_user_api().get_user)
+            return prime_user_cache(response.data.user)
+        return _user_cache
+
     @mcp.tool()
     @log_tool_call
-    def get_user() -> Dict[str, Any]:
+    async def get_user() -> Dict[str, Any]:
         """
         Get authenticated user information.
         
@@ -25,23 +66,19 @@ def register_tools(mcp: FastMCP, get_client_func):
             User details including ID and name
         """
         try:
-            with get_client_func() as api_client:
-                api = user_api.UserApi(api_client)
-                response = api.get_user()
-                
-                user = response.data.user
-                return {
-                    "id": user.id,
-                    "name": user.name if hasattr(user, 'name') else None,
-                    "message": "User information retrieved successfully"
-                }
+            user = await get_cached_user()
+            return {
+                "id": user["id"],
+                "name": user["name"],
+                "message": "User information retrieved successfully"
+            }
         except Exception as e:
-            logger.exception(f"Error getting user information: {e}")
+            log_tool_error("Error getting user information", e)
             return {"error": str(e)}
     
     @mcp.tool()
     @log_tool_call
-    def verify_api_key() -> Dict[str, Any]:
+    async def verify_api_key() -> Dict[str, Any]:
         """
         Verify that the YNAB API key is valid and working.
         
@@ -49,18 +86,14 @@ def register_tools(mcp: FastMCP, get_client_func):
             Verification status and user information if successful
         """
         try:
-            with get_client_func() as api_client:
-                api = user_api.UserApi(api_client)
-                response = api.get_user()
-                
-                user = response.data.user
-                return {
-                    "valid": True,
-                    "user_id": user.id,
-                    "message": "API key is valid and authenticated"
-                }
+            user = await get_cached_user()
+            return {
+                "valid": True,
+                "user_id": user["id"],
+                "message": "API key is valid and authenticated"
+            }
         except Exception as e:
-            logger.exception(f"API key verification failed: {e}")
+            log_tool_error("API key verification failed", e)
             return {
                 "valid": False,
                 "error": str(e),